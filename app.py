@@ -10,14 +10,20 @@ import sys
 import json
 import fitz  # PyMuPDF
 import os
+import bisect
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+from itertools import compress, groupby, repeat
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QFileDialog,
     QToolBar, QLineEdit, QHBoxLayout, QFrame, QListWidget, QListWidgetItem,
     QSplitter, QToolButton, QCheckBox, QAbstractItemView, QSizePolicy
 )
 
-from PyQt6.QtGui import QPixmap, QImage, QKeySequence, QFont, QColor, QIcon, QPainter, QShortcut, QPen, QPalette
-from PyQt6.QtCore import Qt, QSize, QEvent, pyqtSignal, QRect
+from PyQt6.QtGui import QPixmap, QImage, QKeySequence, QFont, QColor, QIcon, QPainter, QShortcut, QPen, QPalette, QPixmapCache, QPainterPath
+from PyQt6.QtCore import Qt, QSize, QEvent, pyqtSignal, QRect, QRectF, QPoint, QObject, QRunnable, QThreadPool, QTimer
 
 # Define tag colors (hex codes for CSS/style)
 TAG_COLORS = {
@@ -33,6 +39,199 @@ TAG_COLORS_BG = {
     "red": QColor("#F44336"),
     "none": QColor("#444444")
 }
+# Page tags are stored as one byte per page; TAG_NAMES[code] is the tag of a code
+TAG_NAMES = ("none", "green", "yellow", "red")
+TAG_CODES = {tag: code for code, tag in enumerate(TAG_NAMES)}
+# Timeline strip color table, indexed by tag code (untagged pages are black)
+TIMELINE_COLOR_TABLE = [QColor("#000000" if tag == "none" else TAG_COLORS[tag]).rgb() for tag in TAG_NAMES]
+# Sidebar page number label styles, one per tag (black text on yellow)
+TAG_TITLE_CSS = {
+    tag: f"background-color: {bg}; color: {'#000' if tag == 'yellow' else '#FFF'}; padding: 6px 10px; border-radius: 6px;"
+    for tag, bg in TAG_COLORS.items()
+}
+
+# Page renders are sized in steps of this many pixels and scaled to the exact
+# draw rect, so small resizes reuse the same render instead of re-rasterizing
+RENDER_SIZE_BUCKET = 32
+
+# Maximum number of sidebar thumbnails kept in memory at once
+THUMB_LRU_MAX = 128
+
+# Size of the shared QPixmapCache for page renders, in KB
+PIXMAP_CACHE_LIMIT_KB = 256 * 1024
+
+# Number of pages searched per background search task
+SEARCH_CHUNK_PAGES = 64
+
+# Maximum number of extracted page texts (fitz.TextPage) kept for reuse
+TEXTPAGE_LRU_MAX = 32
+
+def fitz_pixmap_to_qimage(pix):
+    """
+    Wraps a fitz.Pixmap's pixel buffer in a QImage without copying it.
+    The returned image points into `pix`, so the pixmap must stay alive
+    until the image has been converted (QPixmap.fromImage) or copied.
+    """
+    img_format = QImage.Format.Format_RGB888 if pix.alpha == 0 else QImage.Format.Format_RGBA8888
+    return QImage(pix.samples_mv, pix.width, pix.height, pix.stride, img_format)
+
+# fitz.Document handles of background workers {thread id: ((pdf_path, generation), doc)}.
+# threading.local can't be used: Python discards it after every QRunnable.run()
+# on a QThreadPool thread, while the native thread id stays the same.
+_worker_docs = {}
+_worker_docs_lock = threading.Lock()
+
+def worker_document(pdf_path, generation):
+    """
+    Returns a fitz.Document for `pdf_path` owned by the calling worker thread.
+    fitz.Document objects must not be shared between threads, so every pool
+    thread opens its own handle and reuses it across tasks until the document changes.
+    """
+    key = (pdf_path, generation)
+    thread_id = threading.get_ident()
+    with _worker_docs_lock:
+        entry = _worker_docs.get(thread_id)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    if entry is not None:
+        entry[1].close() # Handle belongs to a previously loaded document
+    doc = fitz.open(pdf_path)
+    with _worker_docs_lock:
+        _worker_docs[thread_id] = (key, doc)
+    return doc
+
+def close_worker_documents():
+    """Closes all worker document handles; only call while no worker task is running."""
+    with _worker_docs_lock:
+        entries = list(_worker_docs.values())
+        _worker_docs.clear()
+    for _, doc in entries:
+        doc.close()
+
+
+class RenderSignals(QObject):
+    """
+    Lives in the GUI thread and relays finished background work
+    (thumbnails, prefetched pages and search results) back to the main window.
+    """
+    thumbnailReady = pyqtSignal(int, int, QImage) # (generation, page_num, image)
+    pageReady = pyqtSignal(int, object, QImage)   # (generation, pixmap cache key, image)
+    searchReady = pyqtSignal(int, int, object)    # (search_id, chunk index, [(page_num, fitz.Rect)])
+
+    def __init__(self, parent=None):
+        """Initialize the signal relay."""
+        super().__init__(parent)
+        self.generation = 0          # Bumped whenever a new PDF is loaded; stale tasks bail out
+        self.prefetch_keys = set()   # Page renders that are still wanted
+        self.thumb_pages = set()     # Thumbnails that are still wanted (rows in view)
+        self.search_id = 0           # Bumped for every new search; older search tasks bail out
+
+
+class ThumbnailTask(QRunnable):
+    """
+    Renders a single sidebar thumbnail on a QThreadPool worker thread.
+    """
+    def __init__(self, signals, pdf_path, generation, page_num, cache_dir=None):
+        """Store everything the worker needs; no GUI objects are touched off-thread."""
+        super().__init__()
+        self.signals = signals
+        self.pdf_path = pdf_path
+        self.generation = generation
+        self.page_num = page_num
+        self.cache_dir = cache_dir # On-disk thumbnail cache for this PDF version, if any
+
+    def run(self):
+        """
+        Loads the thumbnail from the on-disk cache, or renders the page at
+        low resolution (and caches it), then emits the resulting QImage.
+        """
+        if self.signals.generation != self.generation or self.page_num not in self.signals.thumb_pages:
+            return # Document changed or the row was scrolled out of view
+        cache_file = os.path.join(self.cache_dir, f"{self.page_num}.png") if self.cache_dir else None
+        if cache_file and os.path.exists(cache_file):
+            qimage = QImage(cache_file)
+            if not qimage.isNull(): # Unreadable files are simply rendered again
+                self.signals.thumbnailReady.emit(self.generation, self.page_num, qimage)
+                return
+        try:
+            doc = worker_document(self.pdf_path, self.generation)
+            page = doc.load_page(self.page_num)
+            thumb_mat = fitz.Matrix(0.2, 0.2) # Low-res zoom
+            pix = page.get_pixmap(matrix=thumb_mat)
+            if cache_file:
+                try:
+                    pix.save(cache_file) # MuPDF's own PNG encoder
+                except Exception as e:
+                    print(f"Error caching thumbnail for page {self.page_num}: {e}")
+            # Deep copy so the image outlives the fitz pixmap buffer
+            qimage = fitz_pixmap_to_qimage(pix).copy()
+        except Exception as e:
+            print(f"Error generating thumbnail for page {self.page_num}: {e}")
+            return
+        self.signals.thumbnailReady.emit(self.generation, self.page_num, qimage)
+
+
+class PageRenderTask(QRunnable):
+    """
+    Renders a full-size page pixmap ahead of time on a QThreadPool worker thread.
+    """
+    def __init__(self, signals, pdf_path, generation, key, zoom):
+        """Store everything the worker needs; no GUI objects are touched off-thread."""
+        super().__init__()
+        self.signals = signals
+        self.pdf_path = pdf_path
+        self.generation = generation
+        self.key = key # (page_num, render_w, render_h, dpr), as used by PDFPageView
+        self.zoom = zoom
+
+    def run(self):
+        """Renders the page and emits the resulting QImage."""
+        if self.signals.generation != self.generation or self.key not in self.signals.prefetch_keys:
+            return # Document changed or the user has moved on
+        try:
+            doc = worker_document(self.pdf_path, self.generation)
+            page = doc.load_page(self.key[0])
+            pix = page.get_pixmap(matrix=fitz.Matrix(self.zoom, self.zoom), alpha=False)
+            # Deep copy so the image outlives the fitz pixmap buffer
+            qimage = fitz_pixmap_to_qimage(pix).copy()
+        except Exception as e:
+            print(f"Error prefetching page {self.key[0]}: {e}")
+            return
+        self.signals.pageReady.emit(self.generation, self.key, qimage)
+
+
+class SearchTask(QRunnable):
+    """
+    Searches a chunk of pages for a text query on a QThreadPool worker thread.
+    """
+    def __init__(self, signals, pdf_path, generation, search_id, chunk_index, page_nums, text):
+        """Store everything the worker needs; no GUI objects are touched off-thread."""
+        super().__init__()
+        self.signals = signals
+        self.pdf_path = pdf_path
+        self.generation = generation
+        self.search_id = search_id
+        self.chunk_index = chunk_index
+        self.page_nums = page_nums
+        self.text = text
+
+    def run(self):
+        """Collects (page_num, rect) hits for the chunk and emits them (possibly empty)."""
+        if self.signals.search_id != self.search_id:
+            return # A newer search replaced this one
+        hits = []
+        try:
+            doc = worker_document(self.pdf_path, self.generation)
+            for page_num in self.page_nums:
+                if self.signals.search_id != self.search_id:
+                    return
+                page = doc.load_page(page_num)
+                for r in page.search_for(self.text):
+                    hits.append((page_num, r))
+        except Exception as e:
+            print(f"Error searching pages {self.page_nums[0]}-{self.page_nums[-1]}: {e}")
+            hits = []
+        self.signals.searchReady.emit(self.search_id, self.chunk_index, hits)
 
 class PDFPageView(QLabel):
     """
@@ -52,23 +251,50 @@ class PDFPageView(QLabel):
         self.setMouseTracking(True) # Enable mouse move events even when no button is pressed
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus) # Widget can receive keyboard focus
         self._page = None        # The current fitz.Page object
+        self._display_list = None # The current page's parsed drawing commands (fitz.DisplayList)
         self._pixmap = None      # The cached QPixmap render of the page
+        self._pixmap_target = None # The draw rect the pixmap and word rects were prepared for
         self._zoom = 1.0         # Current zoom level (calculated)
+        self._p2w = None         # Cached page-to-widget transform (tx, ty, zoom)
         self._selecting = False  # Flag for active mouse selection
         self._selection = None   # The QRect of the current selection (in widget coords)
-        self._words = []         # List of words on the page from fitz
+        self._word_boxes = []    # (x0, y0, x1, y1) of each word on the page, in page coordinates
+        self._word_texts = []    # Text of each word, parallel to self._word_boxes
         self._sel_word_rects = [] # List of QRects for *selected* words
+        self._last_sel_bbox = QRect() # Bounding box of the selection as last painted
+        self._sel_path = None         # QPainterPath of the selected word rects
+        self._sel_path_source = None  # The _sel_word_rects list the path was built from
+        # Coalesce drag updates: recompute the selection at most once per event-loop pass
+        self._pending_mouse_point = None
+        self._sel_update_timer = QTimer(self)
+        self._sel_update_timer.setSingleShot(True)
+        self._sel_update_timer.setInterval(0)
+        self._sel_update_timer.timeout.connect(self._do_selection_update)
+        # While the widget is being resized, scale the page with cheap nearest-neighbour
+        # sampling and do one smooth repaint once resizing has settled
+        self._interactive = False
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(200)
+        self._settle_timer.timeout.connect(self._end_interactive)
         self._word_rects_widget = [] # List of QRects for *all* words (in widget coords)
+        self.cache_namespace = "" # Prefix for QPixmapCache keys (the PDF path)
+        self._page_size = (1.0, 1.0)   # Page width/height in points, read once per page
+        self._cached_target = None     # Last result of image_draw_rect()
+        self._cached_target_key = None # (widget size, page size) the cached rect was computed for
+        self._fit_width = True         # Whether the cached rect is limited by the widget width
+        self._dpr = self.devicePixelRatioF() # Cached device pixel ratio, refreshed on screen change
+        self._screen_hooked = False    # Whether screenChanged of the top-level window is connected
 
     def select_all_text(self):
         """Selects all words on the current page."""
-        if not self._page or not self._words:
+        if not self._page or not self._word_boxes:
             return
         # Set selection rectangle to the entire widget
         self._selection = QRect(0, 0, self.width(), self.height())
         # Convert all word rects from page coordinates to widget coordinates
-        self._sel_word_rects = [self.page_rect_to_widget_rect(fitz.Rect(x0, y0, x1, y1))
-                                for (x0, y0, x1, y1, *_ ) in self._words]
+        self._sel_word_rects = self._affine_page_to_widget(self._word_boxes)
+        self._last_sel_bbox = self.selection_bbox()
         self.selectionChanged.emit() # Notify that selection has changed
         self.update() # Trigger a repaint
 
@@ -78,31 +304,60 @@ class PDFPageView(QLabel):
         focusing only on words visible within the target QRect.
         """
         self._word_rects_widget = []
-        if not self._page or target.isEmpty() or not self._words:
+        if not self._page or target.isEmpty() or not self._word_boxes:
             return
-        rects = []
-        for w in self._words:
-            x0, y0, x1, y1, *_ = w
-            wr = fitz.Rect(x0, y0, x1, y1) # Page coordinates
-            wr_qt = self.page_rect_to_widget_rect(wr) # Widget coordinates
-            if wr_qt.intersects(target): # Only cache visible/nearby words
-                rects.append(wr_qt)
-        self._word_rects_widget = rects
+        # Only cache visible/nearby words
+        self._word_rects_widget = self._affine_page_to_widget(self._word_boxes, clip=target)
 
-    def set_page(self, page):
+    def _affine_page_to_widget(self, boxes, clip=None):
+        """
+        Converts a list of (x0, y0, x1, y1) page-coordinate boxes to widget
+        QRects in one pass, computing the page-to-widget transform only once.
+        If `clip` is given, boxes whose widget rect does not intersect it are dropped.
+        """
+        tx, ty, zoom = self.page_to_widget_transform()
+        rects = []
+        if clip is None:
+            for x0, y0, x1, y1 in boxes:
+                wx0, wy0 = int(tx + x0 * zoom), int(ty + y0 * zoom)
+                rects.append(QRect(wx0, wy0, int(tx + x1 * zoom) - wx0, int(ty + y1 * zoom) - wy0))
+            return rects
+
+        # Same test as QRect.intersects(), done on plain ints before building the QRect
+        cl, ct, cr, cb = clip.left(), clip.top(), clip.right(), clip.bottom()
+        for x0, y0, x1, y1 in boxes:
+            wx0, wy0 = int(tx + x0 * zoom), int(ty + y0 * zoom)
+            wx1, wy1 = int(tx + x1 * zoom), int(ty + y1 * zoom)
+            if wx0 < wx1 and wy0 < wy1 and wx0 <= cr and wx1 > cl and wy0 <= cb and wy1 > ct:
+                rects.append(QRect(wx0, wy0, wx1 - wx0, wy1 - wy0))
+        return rects
+
+    def set_page(self, page, textpage=None):
         """
         Sets a new fitz.Page to be displayed and resets widget state.
+        `textpage` is an already extracted fitz.TextPage of `page` to reuse.
         """
+        if page is not self._page:
+            self._display_list = None # Built on first render; kept while the same page is re-set
         self._page = page
-        # Invalidate cached pixmap and selection
+        # Invalidate cached pixmap, draw rect and selection
         self._pixmap = None
+        self._cached_target_key = None
+        self._p2w = None
+        self._page_size = (float(page.rect.width), float(page.rect.height)) if page else (1.0, 1.0)
         self._selection = None
         self._sel_word_rects = []
+        self._last_sel_bbox = QRect()
+        self._sel_update_timer.stop()
+        self._pending_mouse_point = None
         try:
             # Extract word information for text selection
-            self._words = page.get_text("words")
+            words = page.get_text("words", textpage=textpage)
         except Exception:
-            self._words = [] # Handle pages with no text
+            words = [] # Handle pages with no text
+        # Keep geometry and text in separate lists so selection tests avoid per-word unpacking
+        self._word_boxes = [(w[0], w[1], w[2], w[3]) for w in words]
+        self._word_texts = [w[4] for w in words]
         self.update() # Trigger repaint
         self._word_rects_widget = [] # Clear word rect cache
 
@@ -114,24 +369,37 @@ class PDFPageView(QLabel):
         """Returns the page width and height in points (PDF coordinates)."""
         if not self._page:
             return 1.0, 1.0
-        r = self._page.rect
-        return float(r.width), float(r.height)
+        return self._page_size
 
     def image_draw_rect(self):
         """
-        Calculates the QRect (in widget coordinates) where the page pixmap
-        should be drawn, maintaining aspect ratio and adding a margin.
+        Returns the QRect (in widget coordinates) where the page pixmap
+        should be drawn. The result is cached until the widget or page size
+        changes; callers must not modify the returned rect.
         """
         if not self._page:
             return QRect()
+        pw, ph = self.page_size_pts()
+        key = (self.width(), self.height(), pw, ph)
+        if key != self._cached_target_key:
+            self._cached_target, self._fit_width = self._compute_image_draw_rect(pw, ph)
+            self._cached_target_key = key
+        return self._cached_target
+
+    def _compute_image_draw_rect(self, pw, ph):
+        """
+        Calculates where a page of `pw` x `ph` points should be drawn,
+        maintaining aspect ratio and adding a margin.
+        Returns (rect, fit_width), where fit_width tells which side limits the fit.
+        """
         margin = 10
         avail = self.rect().adjusted(margin, margin, -margin, -margin) # Available space
-        pw, ph = self.page_size_pts()
         pm_ratio = pw / max(1.0, ph) # Page aspect ratio
         box_ratio = avail.width() / max(1, avail.height()) # Widget aspect ratio
 
         # Fit to width or height to maintain aspect ratio
-        if pm_ratio > box_ratio:
+        fit_width = pm_ratio > box_ratio
+        if fit_width:
             # Fit to width
             w = avail.width()
             h = int(w / pm_ratio)
@@ -143,7 +411,7 @@ class PDFPageView(QLabel):
             w = int(h * pm_ratio)
             x = avail.left() + (avail.width() - w) // 2
             y = avail.top()
-        return QRect(x, y, w, h)
+        return QRect(x, y, w, h), fit_width
 
     def ensure_pixmap_for_target(self, target: QRect):
         """
@@ -154,34 +422,115 @@ class PDFPageView(QLabel):
             self._pixmap = None
             return
         
-        dpr = self.devicePixelRatioF() # Handle high-DPI displays
+        dpr = self._dpr # Handle high-DPI displays
         pw, ph = self.page_size_pts()
+
+        # Zoom from page points to widget pixels (used for text selection geometry),
+        # taken along the side that limited the fit in image_draw_rect()
+        zoom = target.width() / max(1.0, pw) if self._fit_width else target.height() / max(1.0, ph)
+        self._zoom = zoom
+        self._p2w = (target.left(), target.top(), zoom)
+
+        # The render itself is size-bucketed; a bucket hit comes straight from the cache
+        render_w, render_h, render_zoom = self._render_params(target, pw, ph, dpr)
+        self._pixmap = self._render_page_pixmap(render_w, render_h, dpr, render_zoom)
+        self._pixmap_target = QRect(target)
         
-        # Calculate render size based on target rect and DPI
-        render_w = max(1, int(target.width() * dpr))
-        render_h = max(1, int(target.height() * dpr))
+        # Update word rectangles cache since zoom/target has changed
+        self.rebuild_word_widget_rects(target)
+
+    def _render_params(self, target, pw, ph, dpr):
+        """
+        Returns (render_w, render_h, zoom) for rendering a page of
+        `pw` x `ph` points into `target` on a display with the given DPR.
+        The target size is rounded down to RENDER_SIZE_BUCKET steps first.
+        """
+        bucket_w = max(RENDER_SIZE_BUCKET, target.width() // RENDER_SIZE_BUCKET * RENDER_SIZE_BUCKET)
+        bucket_h = max(RENDER_SIZE_BUCKET, target.height() // RENDER_SIZE_BUCKET * RENDER_SIZE_BUCKET)
+
+        # Calculate render size based on bucketed target size and DPI
+        render_w = max(1, int(bucket_w * dpr))
+        render_h = max(1, int(bucket_h * dpr))
         
         # Calculate zoom needed to fit the page to the render size
         zoom_x = render_w / max(1.0, pw)
         zoom_y = render_h / max(1.0, ph)
         zoom = min(zoom_x, zoom_y) # Use smallest zoom to fit
-        self._zoom = zoom
-        
-        # Render using fitz
+        return render_w, render_h, zoom
+
+    def prefetch_request(self, page_num, pw, ph):
+        """
+        Returns (cache_key, zoom) needed to pre-render page `page_num`
+        (of `pw` x `ph` points) at the current view size, or None if
+        it is already cached or cannot be rendered yet.
+        """
+        target, _ = self._compute_image_draw_rect(pw, ph)
+        if target.isEmpty():
+            return None
+        dpr = self._dpr
+        render_w, render_h, zoom = self._render_params(target, pw, ph, dpr)
+        key = (page_num, render_w, render_h, dpr)
+        if QPixmapCache.find(self.pixmap_cache_key(key)) is not None:
+            return None
+        return key, zoom
+
+    def pixmap_cache_key(self, key):
+        """Converts a (page_num, render_w, render_h, dpr) tuple into a QPixmapCache key."""
+        page_num, render_w, render_h, dpr = key
+        return f"{self.cache_namespace}:{page_num}:{render_w}x{render_h}@{dpr}"
+
+    def store_pixmap(self, key, pm):
+        """Adds a rendered page pixmap to the shared QPixmapCache."""
+        QPixmapCache.insert(self.pixmap_cache_key(key), pm)
+
+    def _render_page_pixmap(self, render_w, render_h, dpr, zoom):
+        """
+        Returns the QPixmap of the current page at the given render size,
+        reusing a previously rendered pixmap from QPixmapCache when possible.
+        """
+        key = (self._page.number, render_w, render_h, dpr)
+        pm = QPixmapCache.find(self.pixmap_cache_key(key))
+        if pm is not None:
+            return pm
+
+        # Render using fitz, replaying the page's display list instead of re-parsing it
         mat = fitz.Matrix(zoom, zoom)
-        pix = self._page.get_pixmap(matrix=mat, alpha=False)
+        pix = self.display_list().get_pixmap(matrix=mat, alpha=False)
         
-        # Convert fitz pixmap to QImage
-        img_format = QImage.Format.Format_RGB888 if pix.alpha == 0 else QImage.Format.Format_RGBA8888
-        qimage = QImage(pix.samples, pix.width, pix.height, pix.stride, img_format)
-        
-        # Convert QImage to QPixmap and set DPI
-        pm = QPixmap.fromImage(qimage)
+        # Convert fitz pixmap to QPixmap (the QImage only borrows pix's buffer) and set DPI
+        pm = QPixmap.fromImage(fitz_pixmap_to_qimage(pix))
         pm.setDevicePixelRatio(dpr)
-        self._pixmap = pm
-        
-        # Update word rectangles cache since zoom/target has changed
-        self.rebuild_word_widget_rects(target)
+        self.store_pixmap(key, pm)
+        return pm
+
+    def display_list(self, page_num=None):
+        """
+        Returns the fitz.DisplayList of the current page, building it on first use,
+        so repeated renders (resizes, clipboard copies) skip content stream parsing.
+        Returns None if there is no page or `page_num` is not the page shown.
+        """
+        if self._page is None or (page_num is not None and self._page.number != page_num):
+            return None
+        if self._display_list is None:
+            self._display_list = self._page.get_displaylist()
+        return self._display_list
+
+    def showEvent(self, event):
+        """Tracks the window's screen so the cached device pixel ratio stays correct."""
+        super().showEvent(event)
+        handle = self.window().windowHandle()
+        if handle is not None and not self._screen_hooked:
+            handle.screenChanged.connect(self._on_screen_changed)
+            self._screen_hooked = True
+        self._on_screen_changed()
+
+    def _on_screen_changed(self, screen=None):
+        """Refreshes the cached device pixel ratio and re-renders if it changed."""
+        dpr = self.devicePixelRatioF()
+        if dpr != self._dpr:
+            self._dpr = dpr
+            self._pixmap = None
+            self.update()
 
     def paintEvent(self, event):
         """Renders the PDF page, selection, and border."""
@@ -193,22 +542,23 @@ class PDFPageView(QLabel):
             target = self.image_draw_rect()
             
             # Check if the cached pixmap is invalid (e.g., due to resize)
-            if self._pixmap is None or abs(self._pixmap.width() / max(1.0, self.devicePixelRatioF()) - target.width()) > 1 or abs(self._pixmap.height() / max(1.0, self.devicePixelRatioF()) - target.height()) > 1:
-                # Re-render the pixmap if needed
+            if self._pixmap is None or target != self._pixmap_target:
+                # Re-render the pixmap if needed (only when crossing a size bucket)
                 self.ensure_pixmap_for_target(target)
 
             if self._pixmap:
-                # Draw the rendered PDF page
-                painter.drawPixmap(target.topLeft(), self._pixmap)
+                # Draw the rendered PDF page, scaled from its size bucket to the exact target
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, not self._interactive)
+                painter.drawPixmap(target, self._pixmap)
 
         # draw selection
         if self._sel_word_rects:
             pen = QPen(QColor(255, 255, 255, 220)) # Light border for selection
             pen.setWidth(1)
             painter.setPen(pen)
-            for wr in self._sel_word_rects:
-                painter.fillRect(wr, QColor(0, 120, 215, 80)) # Blue selection box
-                painter.drawRect(wr) # Border for selection
+            path = self.selection_path()
+            painter.fillPath(path, QColor(0, 120, 215, 80)) # Blue selection boxes
+            painter.drawPath(path) # Borders for selection
 
         # draw page border based on tag
         if hasattr(self, "border_color") and self.border_color:
@@ -247,15 +597,33 @@ class PDFPageView(QLabel):
                         break
         self.setCursor(Qt.CursorShape.IBeamCursor if hovered_word else Qt.CursorShape.ArrowCursor)
 
-        # If actively selecting, update the selection rectangle
+        # If actively selecting, schedule a selection update for the latest position
         if self._selecting and self._selection:
-            self._selection.setBottomRight(p)
-            self.compute_word_selection() # Update selected words live
-            self.update() # Repaint
+            self._pending_mouse_point = p
+            if not self._sel_update_timer.isActive():
+                self._sel_update_timer.start()
+
+    def _do_selection_update(self):
+        """Applies the most recent drag position to the selection and repaints it."""
+        p = self._pending_mouse_point
+        self._pending_mouse_point = None
+        if p is None or not (self._selecting and self._selection):
+            return
+        self._selection.setBottomRight(p)
+        self.compute_word_selection() # Update selected words live
+        # Repaint only the area covered by the old and new selection
+        new_bbox = self.selection_bbox()
+        dirty = self._last_sel_bbox.united(new_bbox).adjusted(-2, -2, 2, 2)
+        self._last_sel_bbox = new_bbox
+        if not dirty.isEmpty():
+            self.update(dirty)
 
     def mouseReleaseEvent(self, event):
         """Stops the selection drag operation."""
         if event.button() == Qt.MouseButton.LeftButton and self._selecting:
+            if self._sel_update_timer.isActive():
+                self._sel_update_timer.stop()
+                self._do_selection_update() # Apply the last drag position before finishing
             self._selecting = False
             # If selection is tiny (a click), clear it
             if self._selection and self._selection.width() < 3 and self._selection.height() < 3:
@@ -263,9 +631,35 @@ class PDFPageView(QLabel):
                 self._sel_word_rects = []
             
             self.compute_word_selection() # Finalize selected words
+            self._last_sel_bbox = self.selection_bbox()
             self.selectionChanged.emit()
             self.update()
 
+    def selection_path(self):
+        """
+        Returns a QPainterPath containing all selected word rects, so the
+        selection can be filled and outlined with one call each. The path is
+        rebuilt only when `self._sel_word_rects` has been replaced.
+        """
+        if self._sel_path_source is not self._sel_word_rects:
+            path = QPainterPath()
+            path.setFillRule(Qt.FillRule.WindingFill) # Overlapping words must not cancel out
+            for wr in self._sel_word_rects:
+                path.addRect(QRectF(wr))
+            self._sel_path = path
+            self._sel_path_source = self._sel_word_rects
+        return self._sel_path
+
+    def selection_bbox(self):
+        """Returns the bounding QRect of all selected word rects (empty if none)."""
+        if not self._sel_word_rects:
+            return QRect()
+        left = min(r.left() for r in self._sel_word_rects)
+        top = min(r.top() for r in self._sel_word_rects)
+        right = max(r.right() for r in self._sel_word_rects)
+        bottom = max(r.bottom() for r in self._sel_word_rects)
+        return QRect(left, top, right - left + 1, bottom - top + 1)
+
     def widget_rect_to_page_rect(self, widget_rect: QRect):
         """
         Converts a QRect from widget coordinates to a fitz.Rect
@@ -290,15 +684,25 @@ class PDFPageView(QLabel):
         Converts a fitz.Rect (in PDF page coordinates) to a QRect
         in widget coordinates.
         """
-        target = self.image_draw_rect()
+        tx, ty, zoom = self.page_to_widget_transform()
         
         # Convert coordinates from page space to widget space
-        x0 = int(target.left() + rect_pts.x0 * self._zoom)
-        y0 = int(target.top() + rect_pts.y0 * self._zoom)
-        x1 = int(target.left() + rect_pts.x1 * self._zoom)
-        y1 = int(target.top() + rect_pts.y1 * self._zoom)
+        x0 = int(tx + rect_pts.x0 * zoom)
+        y0 = int(ty + rect_pts.y0 * zoom)
+        x1 = int(tx + rect_pts.x1 * zoom)
+        y1 = int(ty + rect_pts.y1 * zoom)
         return QRect(x0, y0, x1 - x0, y1 - y0)
 
+    def page_to_widget_transform(self):
+        """
+        Returns (tx, ty, zoom) mapping page coordinates to widget coordinates
+        as `widget = t + page * zoom`. Cached when the pixmap is rendered.
+        """
+        if self._p2w is None:
+            target = self.image_draw_rect()
+            return target.left(), target.top(), self._zoom
+        return self._p2w
+
     def compute_word_selection(self):
         """
         Updates `self._sel_word_rects` based on the current
@@ -313,15 +717,18 @@ class PDFPageView(QLabel):
         if not sel_rect_page:
             return
         
-        # Find all words that intersect the selection rectangle
-        wrs = []
-        for w in self._words:
-            x0, y0, x1, y1, *_ = w
-            wr = fitz.Rect(x0, y0, x1, y1)
-            if wr.intersects(sel_rect_page):
-                # If intersecting, add its *widget* rect to the list
-                wrs.append(self.page_rect_to_widget_rect(wr))
-        self._sel_word_rects = wrs
+        # Find all words that intersect the selection rectangle and keep their *widget* rects
+        boxes = self._word_boxes
+        self._sel_word_rects = self._affine_page_to_widget([boxes[i] for i in self.words_intersecting(sel_rect_page)])
+
+    def words_intersecting(self, rect_pts: fitz.Rect):
+        """
+        Returns the indices of all words whose box intersects `rect_pts`
+        (in PDF page coordinates), in page reading order.
+        """
+        sx0, sy0, sx1, sy1 = rect_pts
+        return [i for i, (x0, y0, x1, y1) in enumerate(self._word_boxes)
+                if x0 < sx1 and x1 > sx0 and y0 < sy1 and y1 > sy0]
 
     def selected_text(self):
         """
@@ -335,31 +742,36 @@ class PDFPageView(QLabel):
         if not sel_rect_page:
             return ""
         
-        # Find all words intersecting the selection
-        words = []
-        for w in self._words:
-            x0, y0, x1, y1, text, *_ = w
-            if fitz.Rect(x0, y0, x1, y1).intersects(sel_rect_page):
-                words.append((y0, x0, text)) # Store with position for sorting
+        # Find all words intersecting the selection and order them
+        # by vertical, then horizontal position (sorting indices, not tuples)
+        boxes, texts = self._word_boxes, self._word_texts
+        order = sorted(self.words_intersecting(sel_rect_page), key=lambda i: (boxes[i][1], boxes[i][0]))
         
-        # Sort words by vertical, then horizontal position
-        words.sort()
+        # Find where a new line starts (simple line break detection on vertical jumps)
+        ys = [boxes[i][1] for i in order]
+        breaks = [k for k in range(1, len(ys)) if abs(ys[k] - ys[k - 1]) > 5]
         
-        # Reconstruct the text, adding line breaks
-        out = []
-        last_y = None
-        for y, x, t in words:
-            if last_y is not None and abs(y - last_y) > 5: # Simple line break detection
-                out.append("\n")
-            out.append(t)
-            last_y = y
-        
-        return " ".join(out).replace(" \n ", "\n").strip() # Clean up newlines
+        # Reconstruct the text one joined line at a time
+        lines = []
+        start = 0
+        for end in breaks + [len(order)]:
+            lines.append(" ".join([texts[i] for i in order[start:end]]))
+            start = end
+        return "\n".join(lines).strip()
 
     def resizeEvent(self, event):
         """Handles widget resize, invalidating the pixmap cache."""
         super().resizeEvent(event)
         self._pixmap = None # Pixmap must be re-rendered
+        self._cached_target_key = None # Draw rect depends on widget size
+        self._p2w = None
+        self._interactive = True
+        self._settle_timer.start() # Restarted on every resize step
+        self.update()
+
+    def _end_interactive(self):
+        """Called once resizing has stopped; repaints with smooth scaling."""
+        self._interactive = False
         self.update()
 
         
@@ -378,9 +790,11 @@ class TimelineStrip(QWidget):
         self.setMouseTracking(True)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.total_pages = 0
-        self.page_tags = {} # {page_index: "tag_color"}
+        self.tag_codes = b"" # One TAG_CODES value per page
         self.current_file_page = 0 # The currently viewed page index
         self.bg_color = QColor("#1E1E1E")
+        self._strip_image = None # 1px-tall image, one pixel per page colored by tag
+        self._strip_dirty = True # Rebuild the image on next paint
 
     def mousePressEvent(self, event):
         """Handles clicking on the timeline to navigate."""
@@ -402,17 +816,19 @@ class TimelineStrip(QWidget):
         # Calculate page index under cursor
         idx = int((x / w) * self.total_pages)
         idx = min(max(0, idx), self.total_pages - 1)
-        tag = self.page_tags.get(idx, "none")
+        tag = TAG_NAMES[self.tag_codes[idx]] if idx < len(self.tag_codes) else "none"
         self.setToolTip(f"Page {idx + 1}  Tag {tag}")
 
     def set_total_pages(self, n):
         """Sets the total number of pages to display."""
         self.total_pages = max(0, int(n))
+        self._strip_dirty = True
         self.update()
 
-    def set_page_tags(self, tags_dict):
-        """Sets the dictionary of page tags."""
-        self.page_tags = dict(tags_dict) if tags_dict else {}
+    def set_page_tags(self, tag_codes):
+        """Sets the page tags, given as one TAG_CODES value per page."""
+        self.tag_codes = bytes(tag_codes)
+        self._strip_dirty = True
         self.update()
 
     def set_current_file_page(self, page_index):
@@ -424,6 +840,14 @@ class TimelineStrip(QWidget):
         """Provides a default size hint."""
         return QSize(200, 24)
 
+    def build_strip_image(self):
+        """Builds a 1px-tall QImage with one pixel per page, colored by its tag."""
+        # The tag codes are used directly as the pixels of an indexed image
+        codes = self.tag_codes[:self.total_pages].ljust(self.total_pages, b"\0")
+        img = QImage(codes, self.total_pages, 1, self.total_pages, QImage.Format.Format_Indexed8)
+        img.setColorTable(TIMELINE_COLOR_TABLE)
+        return img.copy() # Detach from the bytes buffer
+
     def paintEvent(self, event):
         """Paints the timeline bar with colored segments for each page tag."""
         if self.total_pages <= 0:
@@ -435,19 +859,11 @@ class TimelineStrip(QWidget):
         w = self.width()
         h = self.height()
 
-        # Draw a colored block for each page
-        for i in range(self.total_pages):
-            x0 = int(i * w / self.total_pages)
-            x1 = int((i + 1) * w / self.total_pages)
-            strip_w = max(1, x1 - x0) # Width of this page's segment
-
-            tag = self.page_tags.get(i, "none")
-            if tag == "none":
-                col = QColor("#000000") # Use black for untagged
-            else:
-                col = QColor(TAG_COLORS.get(tag, TAG_COLORS["none"]))
-
-            painter.fillRect(x0, 0, strip_w, h, col)
+        # Draw all page segments with a single scaled blit of the cached strip image
+        if self._strip_dirty or self._strip_image is None:
+            self._strip_image = self.build_strip_image()
+            self._strip_dirty = False
+        painter.drawImage(QRect(0, 0, w, h), self._strip_image)
 
         # Highlight current file page
         cur_x0 = int(self.current_file_page * w / self.total_pages)
@@ -485,14 +901,17 @@ class PDFTaggerApp(QMainWindow):
         self.doc = None         # The fitz.Document object
         self.pdf_path = pdf_path # Filesystem path to the PDF
         self.tags_path = ""      # Filesystem path to the .json tags file
-        self.page_tags = {}      # Dictionary mapping {page_index: "tag_color"}
+        self.thumb_cache_path = None # Folder with cached thumbnails for the loaded PDF version
+        self._tag_codes = bytearray() # Page tags, one TAG_CODES value per page
         
         # Core App State
         self.current_page_index = 0 # Index within the *visible_pages* list
         self.total_pages = 0        # Total pages in the PDF document
-        self.visible_pages = []     # List of page indices matching the current filter
+        self.visible_pages = []     # List of page indices matching the current filter (sorted)
+        self._visible_index = {}    # Reverse lookup {page_index: position in visible_pages}
         self.active_filters = set() # Set of tags to show (e.g., {"green", "red"})
-        self.search_hits = []       # List of (page_num, fitz.Rect) for search results
+        self.search_hits = []       # List of (page_num, fitz.Rect) for search results on visible pages
+        self.search_hits_all = None # Hits of the last finished search over all pages (None = no results)
         self.current_hit_index = -1 # Current index in self.search_hits
 
         # --- Main Layout ---
@@ -506,6 +925,52 @@ class PDFTaggerApp(QMainWindow):
         self.setup_sidebar()
         self.main_layout.addWidget(self.thumbnail_list_widget)
         self.thumb_title_labels = {} # Cache for page number labels in the sidebar
+        self.thumb_image_labels = {} # Cache for thumbnail image labels in the sidebar
+        self._thumb_rendered = set() # Pages whose thumbnail is shown or queued
+        self._thumb_pending = set()  # Pages whose thumbnail is queued but not delivered yet
+        self._thumb_lru = OrderedDict() # Most recently used thumbnails {page_index: QPixmap}
+        self._hidden_pages = set()   # Pages whose sidebar row is hidden by the filter
+        self._sidebar_dirty = False  # Sidebar updates were skipped while it was hidden
+
+        # Debounce for rendering visible thumbnails after scrolling/filtering
+        self._thumb_timer = QTimer(self)
+        self._thumb_timer.setSingleShot(True)
+        self._thumb_timer.setInterval(50)
+        self._thumb_timer.timeout.connect(self.render_visible_thumbnails)
+
+        # Debounce for re-rendering the page while the window is being resized
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(75)
+        self._resize_timer.timeout.connect(self.render_page)
+
+        # Debounce for writing tags to disk, so rapid tagging coalesces into one save
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self.save_tags)
+
+        # Page renders go through one memory-bounded pixmap cache
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
+
+        # Thumbnails and neighbouring pages are rendered by pool tasks. PyMuPDF holds
+        # the GIL while it works, so this doesn't decode in parallel with the GUI
+        # thread; it splits the work into short slices between event-loop turns
+        self.render_pool = QThreadPool(self)
+        self.render_pool.setMaxThreadCount(2)
+        self.render_signals = RenderSignals(self)
+        self.render_signals.thumbnailReady.connect(self.on_thumbnail_ready)
+        self.render_signals.pageReady.connect(self.on_page_prefetched)
+        self.render_signals.searchReady.connect(self.on_search_chunk_ready)
+
+        # Text search runs in chunks on its own pool so it doesn't queue behind renders;
+        # one thread is enough since the chunks are GIL-bound like the renders
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)
+        self._search_chunks = [] # Per-chunk hit lists of the running search (None = pending)
+
+        # Recently extracted page texts {page_index: (fitz.Page, fitz.TextPage)}
+        self._textpage_cache = OrderedDict()
 
         # --- Main Content Area (PDF Viewer) ---
         self.main_content_widget = QWidget()
@@ -517,8 +982,8 @@ class PDFTaggerApp(QMainWindow):
         self.pdf_frame.setStyleSheet("background-color: #1e1e1e; padding: 10px;")
         frame_layout = QVBoxLayout(self.pdf_frame)
         frame_layout.setContentsMargins(10, 10, 10, 10)
-        frame_layout.addWidget(PDFPageView(self)) # Add the custom PDF view
-        self.pdf_viewer_label = self.pdf_frame.findChild(PDFPageView)
+        self.pdf_viewer_label = PDFPageView(self) # The custom PDF view
+        frame_layout.addWidget(self.pdf_viewer_label)
         self.pdf_viewer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.pdf_viewer_label.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.main_content_layout.addWidget(self.pdf_frame, 1) # PDF view takes up most space
@@ -613,18 +1078,14 @@ class PDFTaggerApp(QMainWindow):
             return
         
         # If the clicked page is visible, go to it
-        if file_page_index in self.visible_pages:
-            self.current_page_index = self.visible_pages.index(file_page_index)
-            self.render_page()
-            return
-        
-        # If clicked page is filtered out, find nearest visible page
-        after = next((p for p in self.visible_pages if p >= file_page_index), None)
-        before = next((p for p in reversed(self.visible_pages) if p <= file_page_index), None)
-        chosen = after if after is not None else before # Prefer 'after'
-        if chosen is not None:
-            self.current_page_index = self.visible_pages.index(chosen)
-            self.render_page()
+        idx = self._visible_index.get(file_page_index)
+        if idx is None:
+            # If clicked page is filtered out, go to the nearest visible page,
+            # preferring the first one after it
+            idx = min(bisect.bisect_left(self.visible_pages, file_page_index), len(self.visible_pages) - 1)
+        self.current_page_index = idx
+        self.render_page()
+        self.center_sidebar_on_current()
 
     def select_all_text_on_slide(self):
         """Select all text in the current page view."""
@@ -632,23 +1093,142 @@ class PDFTaggerApp(QMainWindow):
             self.pdf_viewer_label.select_all_text()
 
     def _title_bg_css(self, tag):
-        """Helper to generate CSS for sidebar page number labels."""
-        fg = "#000" if tag in ("yellow",) else "#FFF" # Black text on yellow bg
-        bg = TAG_COLORS.get(tag, TAG_COLORS["none"])
-        return f"background-color: {bg}; color: {fg}; padding: 6px 10px; border-radius: 6px;"
+        """Helper to look up the CSS for sidebar page number labels."""
+        return TAG_TITLE_CSS.get(tag, TAG_TITLE_CSS["none"])
+
+    def prefetch_neighbour_pages(self):
+        """
+        Queues background renders of the pages right before and after the
+        current one, so that navigating to them can use a cached pixmap.
+        """
+        if not self.doc or not self.visible_pages:
+            return
+        wanted = {}
+        for idx in (self.current_page_index + 1, self.current_page_index - 1):
+            if not 0 <= idx < len(self.visible_pages):
+                continue
+            page_num = self.visible_pages[idx]
+            try:
+                rect = self.doc.load_page(page_num).rect
+            except Exception as e:
+                print(f"Error prefetching page {page_num}: {e}")
+                continue
+            request = self.pdf_viewer_label.prefetch_request(page_num, rect.width, rect.height)
+            if request:
+                key, zoom = request
+                wanted[key] = zoom
+
+        # Tasks for pages that are no longer neighbours are skipped by the workers
+        already_queued = self.render_signals.prefetch_keys
+        self.render_signals.prefetch_keys = set(wanted)
+        for key, zoom in wanted.items():
+            if key not in already_queued:
+                # Higher priority than thumbnails: the user is waiting on these
+                self.render_pool.start(PageRenderTask(self.render_signals, self.pdf_path, self.render_signals.generation, key, zoom), 1)
+
+    def on_page_prefetched(self, generation, key, image):
+        """Stores a page pre-rendered by a worker thread in the viewer's pixmap cache."""
+        if generation != self.render_signals.generation or image.isNull():
+            return
+        self.render_signals.prefetch_keys.discard(key)
+        pm = QPixmap.fromImage(image)
+        pm.setDevicePixelRatio(key[3])
+        self.pdf_viewer_label.store_pixmap(key, pm)
+
+    def on_thumbnail_ready(self, generation, page_num, image):
+        """Places a thumbnail rendered by a worker thread into its sidebar row."""
+        if generation != self.render_signals.generation:
+            return # Result belongs to a previous document
+        self._thumb_pending.discard(page_num)
+        self._thumb_rendered.add(page_num)
+        thumb = self.thumb_image_labels.get(page_num)
+        if thumb is None or image.isNull():
+            return
+        pm = QPixmap.fromImage(image).scaled(thumb.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        thumb.setPixmap(pm)
+        self.store_thumb(page_num, pm)
+
+    def get_thumb(self, page_num):
+        """Returns the cached thumbnail pixmap of a page (marking it recently used), or None."""
+        pm = self._thumb_lru.get(page_num)
+        if pm is not None:
+            self._thumb_lru.move_to_end(page_num)
+        return pm
+
+    def store_thumb(self, page_num, pm):
+        """
+        Adds a thumbnail pixmap to the LRU. Thumbnails pushed out of it are
+        removed from their sidebar row and re-rendered when scrolled into view.
+        """
+        self._thumb_lru[page_num] = pm
+        self._thumb_lru.move_to_end(page_num)
+        while len(self._thumb_lru) > THUMB_LRU_MAX:
+            evicted, _ = self._thumb_lru.popitem(last=False)
+            self._thumb_rendered.discard(evicted)
+            thumb = self.thumb_image_labels.get(evicted)
+            if thumb is not None:
+                thumb.setText("…") # Back to the placeholder; drops the pixmap
+
+    def schedule_visible_thumbnails(self):
+        """
+        (Re)starts the debounce timer for rendering the thumbnails that are
+        scrolled into view, so fast scrolling doesn't queue every page.
+        """
+        self._thumb_timer.start()
+
+    def render_visible_thumbnails(self):
+        """Queues background renders for visible sidebar rows that have no thumbnail yet."""
+        if not self.doc:
+            return
+        visible = self.visible_thumbnail_pages()
+
+        # Cancel queued renders for rows that have been scrolled out of view;
+        # workers skip pages missing from render_signals.thumb_pages
+        for page_num in self._thumb_pending.difference(visible):
+            self._thumb_pending.discard(page_num)
+            self._thumb_rendered.discard(page_num)
+
+        to_render = []
+        for page_num in visible:
+            if page_num in self._thumb_rendered:
+                self.get_thumb(page_num) # Keep visible thumbnails from being evicted
+                continue
+            self._thumb_rendered.add(page_num)
+            self._thumb_pending.add(page_num)
+            to_render.append(page_num)
+
+        # Publish the wanted set before any task can check it
+        self.render_signals.thumb_pages = set(self._thumb_pending)
+        for page_num in to_render:
+            self.render_pool.start(ThumbnailTask(self.render_signals, self.pdf_path, self.render_signals.generation, page_num, self.thumb_cache_path))
+
+    def visible_thumbnail_pages(self):
+        """Returns the page numbers of the sidebar rows currently inside the viewport."""
+        lw = self.thumbnail_list_widget
+        area = lw.viewport().rect()
+        # Find the first row at the top of the viewport (probing past item spacing)
+        first = None
+        for y in range(area.top(), area.bottom() + 1, 8):
+            index = lw.indexAt(QPoint(area.center().x(), y))
+            if index.isValid():
+                first = index.row()
+                break
+        if first is None:
+            return []
+
+        # Walk down until rows start below the viewport
+        pages = []
+        for row in range(first, lw.count()):
+            item = lw.item(row)
+            if item.isHidden():
+                continue
+            rect = lw.visualItemRect(item)
+            if rect.top() > area.bottom():
+                break
+            if area.intersects(rect):
+                pages.append(item.data(Qt.ItemDataRole.UserRole))
+        return pages
 
-    def generate_thumbnail_pixmap(self, page_num):
-        """Renders a small thumbnail QPixmap for a given page number."""
-        try:
-            page = self.doc.load_page(page_num)
-            thumb_mat = fitz.Matrix(0.2, 0.2) # Low-res zoom
-            pix = page.get_pixmap(matrix=thumb_mat)
-            img_format = QImage.Format.Format_RGB888 if pix.alpha == 0 else QImage.Format.Format_RGBA8888
-            qimage = QImage(pix.samples, pix.width, pix.height, pix.stride, img_format)
-            return QPixmap.fromImage(qimage)
-        except Exception as e:
-            print(f"Error generating thumbnail for page {page_num}: {e}")
-            return QPixmap() # Return empty pixmap on error
         
     def center_sidebar_on_current(self):
         """Scrolls the sidebar list to center on the current page item."""
@@ -669,21 +1249,23 @@ class PDFTaggerApp(QMainWindow):
         lay.setContentsMargins(6, 6, 6, 6)
         lay.setSpacing(10)
 
-        # Thumbnail image
-        thumb = QLabel()
+        # Thumbnail image (placeholder until the background render arrives)
+        thumb = QLabel("…")
         thumb.setFixedSize(128, 96)
         thumb.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        pm = self.generate_thumbnail_pixmap(page_num)
-        if not pm.isNull():
-            thumb.setPixmap(pm.scaled(thumb.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        pm = self.get_thumb(page_num)
+        if pm is not None:
+            thumb.setPixmap(pm)
+            self._thumb_rendered.add(page_num)
 
         # Page number label
         title = QLabel(f"{page_num + 1}")
         title.setFixedWidth(60)
         title.setMaximumHeight(50)
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        tag = self.page_tags.get(page_num, "none")
+        tag = self.page_tag(page_num)
         title.setStyleSheet(self._title_bg_css(tag))
+        title.setProperty("tag", tag) # Lets re-tagging skip unchanged styles
         title.setMargin(6)
 
         lay.addWidget(thumb)
@@ -693,8 +1275,9 @@ class PDFTaggerApp(QMainWindow):
         # lay.addWidget(thumb) # Note: Original code had these two lines duplicated
         # lay.addWidget(title, 1)
 
-        # Store label in cache for future updates
+        # Store labels in cache for future updates
         self.thumb_title_labels[page_num] = title
+        self.thumb_image_labels[page_num] = thumb
         return row
 
     def eventFilter(self, obj, event):
@@ -762,14 +1345,30 @@ class PDFTaggerApp(QMainWindow):
         # Save selection
         make_shortcut(QKeySequence(QKeySequence.StandardKey.Save), self.export_filtered_pages)  # Ctrl+S
         
+    def get_text_page(self, page_num):
+        """
+        Returns (fitz.Page, fitz.TextPage) for a page, reusing recent extractions.
+        The TextPage is only valid together with the Page object it came from.
+        """
+        entry = self._textpage_cache.get(page_num)
+        if entry is not None:
+            self._textpage_cache.move_to_end(page_num)
+            return entry
+        page = self.doc.load_page(page_num)
+        entry = (page, page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)) # Same flags as get_text("text"/"words")
+        self._textpage_cache[page_num] = entry
+        while len(self._textpage_cache) > TEXTPAGE_LRU_MAX:
+            self._textpage_cache.popitem(last=False)
+        return entry
+
     def copy_all_text_on_slide(self):
         """Copy all text from the current slide to the clipboard."""
         if not self.doc or not self.visible_pages:
             return
         actual_page_num = self.visible_pages[self.current_page_index]
         try:
-            page = self.doc.load_page(actual_page_num)
-            text = page.get_text("text") # Get full page text
+            page, textpage = self.get_text_page(actual_page_num)
+            text = page.get_text("text", textpage=textpage) # Get full page text
             if text:
                 QApplication.clipboard().setText(text.strip())
         except Exception as e:
@@ -786,14 +1385,16 @@ class PDFTaggerApp(QMainWindow):
         
         actual_page_num = self.visible_pages[self.current_page_index]
         try:
-            page = self.doc.load_page(actual_page_num)
+            # Reuse the viewer's display list of this page when it has one
+            display_list = self.pdf_viewer_label.display_list(actual_page_num)
+            if display_list is None:
+                display_list = self.doc.load_page(actual_page_num).get_displaylist()
             zoom = 2.5 # High-res zoom
             mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            img_format = QImage.Format.Format_RGB888 if pix.alpha == 0 else QImage.Format.Format_RGBA8888
-            qimage = QImage(pix.samples, pix.width, pix.height, pix.stride, img_format)
-            pm = QPixmap.fromImage(qimage)
-            QApplication.clipboard().setPixmap(pm) # Copy image to clipboard
+            pix = display_list.get_pixmap(matrix=mat)
+            image = fitz_pixmap_to_qimage(pix).copy() # Detach from the MuPDF buffer
+            pix = None # Release the MuPDF pixmap right away
+            QApplication.clipboard().setImage(image) # Copy image to clipboard
         except Exception as e:
             print(f"Copy failed for page {actual_page_num}: {e}")
 
@@ -826,6 +1427,8 @@ class PDFTaggerApp(QMainWindow):
         self.thumbnail_list_widget.setMovement(QListWidget.Movement.Static)
         self.thumbnail_list_widget.setSpacing(5)
         self.thumbnail_list_widget.itemSelectionChanged.connect(self.on_selection_changed)
+        # Thumbnails are only rendered for rows scrolled into view
+        self.thumbnail_list_widget.verticalScrollBar().valueChanged.connect(self.schedule_visible_thumbnails)
         self.thumbnail_list_widget.setStyleSheet("""
             QListWidget {
                 background-color: #2D2D2D;
@@ -844,7 +1447,9 @@ class PDFTaggerApp(QMainWindow):
     def reset_search_state(self):
         """Clears all search results and resets search UI."""
         self.search_hits = []
+        self.search_hits_all = None
         self.current_hit_index = -1
+        self.cancel_search()
         if hasattr(self, "search_status_label"):
             self.search_status_label.setText("0 matches")
 
@@ -912,6 +1517,38 @@ class PDFTaggerApp(QMainWindow):
         """Shows or hides the thumbnail sidebar."""
         is_visible = self.thumbnail_list_widget.isVisible()
         self.thumbnail_list_widget.setVisible(not is_visible)
+        if not is_visible:
+            self.rebuild_sidebar_if_dirty()
+            self.schedule_visible_thumbnails()
+
+    def sidebar_deferred(self):
+        """
+        Returns True (and remembers that the sidebar is out of date) if the
+        sidebar is hidden, so sidebar updates can wait until it is shown again.
+        """
+        if self.thumbnail_list_widget.isHidden():
+            self._sidebar_dirty = True
+            return True
+        return False
+
+    def rebuild_sidebar_if_dirty(self):
+        """Applies sidebar updates that were skipped while it was hidden."""
+        if not self._sidebar_dirty:
+            return
+        self._sidebar_dirty = False
+        if self.thumbnail_list_widget.count() != self.total_pages:
+            self.populate_sidebar() # Rows were never built for this document
+        else:
+            # Restyle rows whose tag changed while hidden
+            for page_num, title_lbl in self.thumb_title_labels.items():
+                tag = self.page_tag(page_num)
+                if title_lbl.property("tag") != tag:
+                    title_lbl.setStyleSheet(self._title_bg_css(tag))
+                    title_lbl.setProperty("tag", tag)
+            self.update_sidebar_filter_view()
+        if self.visible_pages:
+            self.select_sidebar_row(self.visible_pages[self.current_page_index])
+            self.center_sidebar_on_current()
 
     def on_selection_changed(self):
         """
@@ -924,11 +1561,13 @@ class PDFTaggerApp(QMainWindow):
             return
         
         page_num = current_item.data(Qt.ItemDataRole.UserRole)
+        self.get_thumb(page_num) # Keep the selected row's thumbnail warm
         
         # Navigate if the clicked page is visible and not already active
-        if page_num in self.visible_pages:
-            if self.visible_pages[self.current_page_index] != page_num:
-                self.current_page_index = self.visible_pages.index(page_num)
+        index = self._visible_index.get(page_num)
+        if index is not None:
+            if self.current_page_index != index:
+                self.current_page_index = index
                 self.render_page()
 
     def export_filtered_pages(self):
@@ -951,17 +1590,12 @@ class PDFTaggerApp(QMainWindow):
         try:
             new_pdf = fitz.open()
 
-            # Sort visible pages and copy in as few ranges as possible
-            visible_sorted = sorted(self.visible_pages)
-            start = visible_sorted[0]
-            end = start
-            for idx in range(1, len(visible_sorted)):
-                if visible_sorted[idx] == end + 1:
-                    end = visible_sorted[idx]
-                else:
-                    new_pdf.insert_pdf(self.doc, from_page=start, to_page=end)
-                    start = end = visible_sorted[idx]
-            new_pdf.insert_pdf(self.doc, from_page=start, to_page=end)
+            # Copy visible pages (already sorted) in as few ranges as possible;
+            # consecutive pages share the same page-minus-position key
+            runs = [list(run) for _, run in groupby(enumerate(self.visible_pages), lambda item: item[1] - item[0])]
+            for n, run in enumerate(runs, 1):
+                # Keep the graft map between calls so shared resources are copied once
+                new_pdf.insert_pdf(self.doc, from_page=run[0][1], to_page=run[-1][1], final=(n == len(runs)))
 
             new_pdf.save(save_path, deflate=True)  # deflate compresses streams
             new_pdf.close()
@@ -977,28 +1611,42 @@ class PDFTaggerApp(QMainWindow):
 
     def load_pdf(self, pdf_path):
         """Loads a PDF document, its tags, and populates the UI."""
+        self.flush_pending_save() # Tags of the previous PDF must land in its own file
+        self._textpage_cache.clear() # Pages and texts belong to the old document
         if self.doc:
             self.doc.close() # Close any previously open document
+            fitz.TOOLS.store_shrink(100) # Start the next document with an empty MuPDF store
+        QPixmapCache.clear() # Cached renders belong to the old document
+        self._thumb_lru.clear()
+        # Drop queued background work; running tasks bail out or are ignored on arrival
+        self.render_pool.clear()
+        self.cancel_search()
+        self.render_signals.generation += 1
+        self.render_signals.prefetch_keys = set()
+        # Release the workers' handles on the old document once running tasks finish
+        self.render_pool.waitForDone()
+        self.search_pool.waitForDone()
+        close_worker_documents()
         try:
             self.doc = fitz.open(pdf_path)
             self.pdf_path = pdf_path
+            self.pdf_viewer_label.cache_namespace = pdf_path
             self.total_pages = len(self.doc)
             self.setWindowTitle(f"PDF Study Tagger - {os.path.basename(pdf_path)}")
 
             # Define the path for the companion tag file
             base_filename = os.path.splitext(self.pdf_path)[0]
             self.tags_path = f"{base_filename}_pdf-tagger-sav.json"
+            self.thumb_cache_path = self.prepare_thumbnail_cache(f"{base_filename}_pdf-tagger-thumbs")
 
             # Load tags if the file exists
             if os.path.exists(self.tags_path):
                 with open(self.tags_path, 'r') as f:
                     loaded = json.load(f)
-                    # Ensure keys are integers
-                    self.page_tags = {int(k): v for k, v in loaded.items()}
             else:
-                self.page_tags = {}
+                loaded = {}
 
-            self.ensure_all_pages_in_tags() # Make sure all pages have at least a "none" tag
+            self.ensure_all_pages_in_tags(loaded) # Make sure all pages have at least a "none" tag
             self.save_tags() # Save to create file or clean up old entries
 
             # --- Update UI ---
@@ -1011,7 +1659,7 @@ class PDFTaggerApp(QMainWindow):
             # Update the bottom timeline
             if hasattr(self, "timeline_strip"):
                 self.timeline_strip.set_total_pages(self.total_pages)
-                self.timeline_strip.set_page_tags(self.page_tags)
+                self.timeline_strip.set_page_tags(self._tag_codes)
                 self.timeline_strip.set_current_file_page(self.visible_pages[self.current_page_index] if self.visible_pages else 0)
 
         except Exception as e:
@@ -1019,10 +1667,53 @@ class PDFTaggerApp(QMainWindow):
             self.page_label.setText("Error loading PDF")
             self.reset_search_state()
 
+    def prepare_thumbnail_cache(self, cache_root):
+        """
+        Returns the on-disk thumbnail cache folder for the current PDF version
+        (a subfolder of `cache_root` named after a hash of the path and mtime),
+        creating it and removing folders left behind by older versions.
+        Returns None if the cache can't be used.
+        """
+        try:
+            stamp = f"{os.path.abspath(self.pdf_path)}:{os.path.getmtime(self.pdf_path)}"
+            version = hashlib.sha1(stamp.encode("utf-8")).hexdigest()[:16]
+            cache_path = os.path.join(cache_root, version)
+            os.makedirs(cache_path, exist_ok=True)
+            # Prune thumbnails of previous versions of this PDF
+            for name in os.listdir(cache_root):
+                if name != version:
+                    shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+            return cache_path
+        except OSError as e:
+            print(f"Thumbnail cache disabled: {e}")
+            return None
+
+    def closeEvent(self, event):
+        """Saves pending tags, stops background renders and releases the document on exit."""
+        self.flush_pending_save()
+        self.render_pool.clear()
+        self.search_pool.clear()
+        self.render_signals.generation += 1 # Running tasks bail out / get ignored
+        self.render_signals.search_id += 1
+        self.render_pool.waitForDone()
+        self.search_pool.waitForDone()
+        close_worker_documents()
+        self._textpage_cache.clear()
+        if self.doc:
+            self.doc.close()
+            self.doc = None
+        super().closeEvent(event)
+
     def populate_sidebar(self):
         """Clears and rebuilds the entire thumbnail list from scratch."""
         self.thumbnail_list_widget.clear()
         self.thumb_title_labels.clear()
+        self.thumb_image_labels.clear()
+        self._thumb_rendered.clear()
+        self._thumb_pending.clear()
+        self._hidden_pages = set() # New rows start out shown
+        if self.sidebar_deferred():
+            return # Rows are built when the sidebar is shown
 
         for i in range(self.total_pages):
             item = QListWidgetItem()
@@ -1042,31 +1733,29 @@ class PDFTaggerApp(QMainWindow):
 
         current_visible_page = self.visible_pages[self.current_page_index] if self.visible_pages else -1
         did_tag_current = False
+        code = TAG_CODES[color]
 
         for page_num in page_numbers:
-            if color == "none":
-                if page_num in self.page_tags:
-                    self.page_tags[page_num] = "none" # Set to none, don't delete
-            else:
-                self.page_tags[page_num] = color
+            self._tag_codes[page_num] = code # "none" is stored like any other tag
 
             if page_num == current_visible_page:
                 did_tag_current = True
 
             # Update the sidebar label style
             title_lbl = self.thumb_title_labels.get(page_num)
-            if title_lbl:
-                tag = self.page_tags.get(page_num, "none")
-                title_lbl.setStyleSheet(self._title_bg_css(tag))
+            if title_lbl and title_lbl.property("tag") != color and not self.sidebar_deferred(): # Restyling re-polishes the label
+                title_lbl.setStyleSheet(self._title_bg_css(color))
+                title_lbl.setProperty("tag", color)
 
         # Update the main viewer border if the current page was tagged
         if did_tag_current:
             self.update_page_border()
 
-        self.save_tags()
+        self._save_timer.start() # Saved once tagging pauses
         self.update_tag_counts_label()
-        self.on_filter_checkbox_changed() # Re-apply filters
-        self.timeline_strip.set_page_tags(self.page_tags) # Update bottom bar
+        if self.apply_filter_delta(page_numbers): # Re-apply filters to the tagged pages only
+            self.refresh_search_after_filter()
+        self.timeline_strip.set_page_tags(self._tag_codes) # Update bottom bar
         
     def update_page_border(self):
         """Updates the colored border around the main PDF view based on its tag."""
@@ -1077,7 +1766,7 @@ class PDFTaggerApp(QMainWindow):
             return
 
         actual_page_num = self.visible_pages[self.current_page_index]
-        tag = self.page_tags.get(actual_page_num, "none")
+        tag = self.page_tag(actual_page_num)
 
         if tag == "none":
             color = None
@@ -1088,15 +1777,25 @@ class PDFTaggerApp(QMainWindow):
         self.pdf_viewer_label.update() # Trigger repaint of PDF view
 
     def save_tags(self):
-        """Saves the current `self.page_tags` dictionary to its JSON file."""
+        """Saves the current page tags to the JSON file as {page_index: "tag_color"}."""
         try:
-            # Sort keys for clean JSON
-            ordered = {str(k): self.page_tags[k] for k in sorted(self.page_tags.keys())}
-            with open(self.tags_path, 'w') as f:
-                json.dump(ordered, f, indent=2)
+            # Tag names are only materialised here; keys come out in page order
+            ordered = {str(k): TAG_NAMES[code] for k, code in enumerate(self._tag_codes)}
+            payload = json.dumps(ordered, separators=(",", ":")).encode("utf-8")
+            # Write a temporary file and swap it in, so a crash never leaves a half-written file
+            tmp_path = self.tags_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.tags_path)
         except Exception as e:
             print(f"Error saving tags: {e}")
 
+    def flush_pending_save(self):
+        """Writes tags immediately if a debounced save is still pending."""
+        if self._save_timer.isActive():
+            self._save_timer.stop()
+            self.save_tags()
+
     def on_filter_checkbox_changed(self):
         """Called when any filter checkbox is toggled."""
         selected = set()
@@ -1116,12 +1815,18 @@ class PDFTaggerApp(QMainWindow):
             self.active_filters = selected
 
         self.update_filter_view()
+        self.refresh_search_after_filter()
 
-        # Force search refresh when filters change
-        if self.search_input.text().strip():
-            # Reset last search to ensure re-search even with same text
-            self._last_search_text = None
-            self.run_search()
+    def refresh_search_after_filter(self):
+        """Updates the active search for the newly visible pages."""
+        text = self.search_input.text().strip()
+        if text and text == getattr(self, "_last_search_text", None) and (self.search_hits_all is not None or self._search_chunks):
+            # Hits don't depend on filters; only which of them are shown does.
+            # A search still running is filtered when it finishes.
+            if self.search_hits_all is not None:
+                self.show_search_results()
+        elif text:
+            self.run_search() # Query was edited since the last search
         else:
             self.reset_search_state()
 
@@ -1135,14 +1840,9 @@ class PDFTaggerApp(QMainWindow):
             self.tag_counts_label.setText("")
             return
 
-        counts = {"green": 0, "yellow": 0, "red": 0}
-        for tag in self.page_tags.values():
-            if tag in counts:
-                counts[tag] += 1
-        
         count_strings = []
         for color in ["green", "yellow", "red"]:
-            count = counts[color]
+            count = self._tag_codes.count(TAG_CODES[color])
             if count > 0:
                 percent = (count / self.total_pages) * 100
                 hex_color = TAG_COLORS[color]
@@ -1154,18 +1854,32 @@ class PDFTaggerApp(QMainWindow):
         
         self.tag_counts_label.setText(" | ".join(count_strings))
 
-    def ensure_all_pages_in_tags(self):
+    def ensure_all_pages_in_tags(self, tags):
         """
-        Ensures `self.page_tags` is valid.
-        1. Removes tags for pages that don't exist (e.g., if PDF changed).
-        2. Adds a "none" tag for any page that doesn't have a tag.
+        Builds `self._tag_codes` from a {page_index: "tag_color"} dict (as loaded from JSON).
+        1. Ignores tags for pages that don't exist (e.g., if PDF changed).
+        2. Gives every other page (or unknown tag) the "none" tag.
         """
-        # 1. Prune invalid page numbers
-        self.page_tags = {int(k): v for k, v in self.page_tags.items() if 0 <= int(k) < self.total_pages}
-        # 2. Add "none" for missing pages
-        for i in range(self.total_pages):
-            if i not in self.page_tags:
-                self.page_tags[i] = "none"
+        if len(tags) == self.total_pages and list(tags) == list(map(str, range(self.total_pages))):
+            # Fast path: a file written by save_tags for this PDF (every page, in order),
+            # so the codes can be mapped straight from the values
+            self._tag_codes = bytearray(map(TAG_CODES.get, tags.values(), repeat(TAG_CODES["none"])))
+            return
+        codes = bytearray(self.total_pages) # Code 0 is "none"
+        for k, tag in tags.items():
+            page_num = int(k)
+            if 0 <= page_num < self.total_pages:
+                codes[page_num] = TAG_CODES.get(tag, TAG_CODES["none"])
+        self._tag_codes = codes
+
+    def page_tag(self, page_num):
+        """Returns the tag name ("green", ..., "none") of a page."""
+        return TAG_NAMES[self._tag_codes[page_num]]
+
+    def set_visible_pages(self, pages):
+        """Replaces `self.visible_pages` (must be sorted) and rebuilds its reverse lookup."""
+        self.visible_pages = pages
+        self._visible_index = {p: i for i, p in enumerate(pages)}
 
     def update_filter_view(self):
         """
@@ -1180,17 +1894,64 @@ class PDFTaggerApp(QMainWindow):
 
         # --- Update visible_pages list ---
         if not self.active_filters: # If no filters, show all
-            self.visible_pages = list(range(self.total_pages))
+            self.set_visible_pages(list(range(self.total_pages)))
         else:
-            # Build list of pages that match the active filters
-            self.visible_pages = [
-                i for i in range(self.total_pages)
-                if self.page_tags.get(i, "none") in self.active_filters
-            ]
+            # Build list of pages that match the active filters: map each tag
+            # code to a 0/1 mask byte, then keep the page numbers flagged 1
+            active_codes = {TAG_CODES[tag] for tag in self.active_filters}
+            table = bytes(1 if code in active_codes else 0 for code in range(256))
+            mask = self._tag_codes.translate(table)
+            self.set_visible_pages(list(compress(range(self.total_pages), mask)))
 
         self.update_sidebar_filter_view() # Hide/show items in sidebar
+        self.restore_current_page(old_actual)
+
+    def apply_filter_delta(self, page_numbers):
+        """
+        Updates `self.visible_pages` after re-tagging `page_numbers` under
+        unchanged filters, touching only those pages instead of refiltering
+        the whole document. Returns True if any page entered or left the view.
+        """
+        if not self.active_filters:
+            return False # Everything is visible regardless of tags
+
+        old_actual = self.visible_pages[self.current_page_index] if self.visible_pages else None
+        changed = False
+        for page_num in page_numbers:
+            wanted = self.page_tag(page_num) in self.active_filters
+            if wanted == (page_num in self._visible_index):
+                continue
+            pos = bisect.bisect_left(self.visible_pages, page_num)
+            if wanted:
+                self.visible_pages.insert(pos, page_num)
+            else:
+                del self.visible_pages[pos]
+            item = self.thumbnail_list_widget.item(page_num)
+            if item is not None and not self.sidebar_deferred():
+                item.setHidden(not wanted)
+                if wanted:
+                    self._hidden_pages.discard(page_num)
+                else:
+                    self._hidden_pages.add(page_num)
+            # Keep membership current for the test above; positions are rebuilt below
+            if wanted:
+                self._visible_index[page_num] = pos
+            else:
+                del self._visible_index[page_num]
+            changed = True
 
-        # --- Handle navigation after filtering ---
+        if not changed:
+            return False
+        self.set_visible_pages(self.visible_pages) # Positions after an insert/remove shifted
+        self.schedule_visible_thumbnails()
+        self.restore_current_page(old_actual)
+        return True
+
+    def restore_current_page(self, old_actual):
+        """
+        Re-selects the page that was shown before `self.visible_pages` changed,
+        or its nearest visible neighbour, and renders it.
+        """
         if not self.visible_pages:
             # No pages match, show empty view
             self.pdf_viewer_label.clear()
@@ -1201,20 +1962,15 @@ class PDFTaggerApp(QMainWindow):
             return
 
         # Try to stay on the same page
-        if old_actual in self.visible_pages:
-            self.current_page_index = self.visible_pages.index(old_actual)
+        if old_actual in self._visible_index:
+            self.current_page_index = self._visible_index[old_actual]
         else:
-            # Current page was filtered out, find the nearest neighbor
-            next_after = next((p for p in self.visible_pages if p > (old_actual if old_actual is not None else -1)), None)
-            if next_after is not None:
-                self.current_page_index = self.visible_pages.index(next_after)
+            # Current page was filtered out, move to the next visible page
+            # (or the last one if nothing follows); visible_pages is sorted
+            if old_actual is None:
+                self.current_page_index = 0 # Default to first page
             else:
-                prev_before = next((p for p in reversed(self.visible_pages) if p < (old_actual if old_actual is not None else 0)), None)
-                if prev_before is not None:
-                    self.current_page_index = self.visible_pages.index(prev_before)
-                else:
-                    self.current_page_index = 0 # Default to first page
-            self.reset_search_state() # Search is invalid after filter change
+                self.current_page_index = min(bisect.bisect_left(self.visible_pages, old_actual), len(self.visible_pages) - 1)
 
         self.render_page()
         self.center_sidebar_on_current()
@@ -1242,13 +1998,21 @@ class PDFTaggerApp(QMainWindow):
 
     def update_sidebar_filter_view(self):
         """Hides or shows items in the sidebar list based on `self.visible_pages`."""
-        is_filtered = bool(self.active_filters)
-        for i in range(self.total_pages):
-            item = self.thumbnail_list_widget.item(i)
-            if is_filtered and i not in self.visible_pages:
-                item.setHidden(True)
-            else:
-                item.setHidden(False)
+        if self.sidebar_deferred():
+            return
+        if self.active_filters:
+            hidden = set(range(self.total_pages)).difference(self._visible_index)
+        else:
+            hidden = set()
+        # Only touch rows whose state changes; each setHidden invalidates the list layout
+        changed = hidden.symmetric_difference(self._hidden_pages)
+        if changed:
+            self.thumbnail_list_widget.setUpdatesEnabled(False)
+            for i in changed:
+                self.thumbnail_list_widget.item(i).setHidden(i in hidden)
+            self.thumbnail_list_widget.setUpdatesEnabled(True)
+        self._hidden_pages = hidden
+        self.schedule_visible_thumbnails() # Different rows may be in view now
                 
     def render_page(self):
         """
@@ -1261,10 +2025,13 @@ class PDFTaggerApp(QMainWindow):
         # Get the *actual file page number*
         actual_page_num = self.visible_pages[self.current_page_index]
         try:
-            page = self.doc.load_page(actual_page_num)
+            page, textpage = self.get_text_page(actual_page_num)
 
             # Set the page in the viewer
-            self.pdf_viewer_label.set_page(page)
+            self.pdf_viewer_label.set_page(page, textpage)
+
+            # The previous page is released now; let MuPDF drop its decoded resources
+            fitz.TOOLS.store_shrink(100)
 
             # Update status label
             self.page_label.setText(
@@ -1275,12 +2042,13 @@ class PDFTaggerApp(QMainWindow):
             self.update_page_border()
 
             # Update sidebar selection
-            self.thumbnail_list_widget.blockSignals(True) # Avoid re-triggering navigation
-            self.thumbnail_list_widget.setCurrentRow(actual_page_num)
-            self.thumbnail_list_widget.blockSignals(False)
+            self.select_sidebar_row(actual_page_num)
             
             # Update timeline highlight
             self.timeline_strip.set_current_file_page(actual_page_num)
+
+            # Render the neighbouring pages once control returns to the event loop
+            QTimer.singleShot(0, self.prefetch_neighbour_pages)
         except Exception as e:
             print(f"Error rendering page {actual_page_num}: {e}")
             
@@ -1288,6 +2056,20 @@ class PDFTaggerApp(QMainWindow):
         if hasattr(self, "timeline_strip"):
             self.timeline_strip.set_current_file_page(actual_page_num)
 
+    def select_sidebar_row(self, page_num):
+        """
+        Makes a page the current sidebar row without the implicit scroll-to
+        (callers that navigate center the sidebar themselves).
+        """
+        item = self.thumbnail_list_widget.item(page_num)
+        if item is None:
+            return # Sidebar rows haven't been built (sidebar hidden)
+        self.thumbnail_list_widget.blockSignals(True) # Avoid re-triggering navigation
+        self.thumbnail_list_widget.setAutoScroll(False)
+        self.thumbnail_list_widget.setCurrentItem(item) # Keeps an extended multi-selection intact
+        self.thumbnail_list_widget.setAutoScroll(True)
+        self.thumbnail_list_widget.blockSignals(False)
+
     def copy_selected_text(self):
         """Copies the currently selected text from the PDF view to the clipboard."""
         if hasattr(self, "pdf_viewer_label") and isinstance(self.pdf_viewer_label, PDFPageView):
@@ -1321,24 +2103,59 @@ class PDFTaggerApp(QMainWindow):
             self.reset_search_state()
             return
 
-        # If same query as last time and hits already exist, just move to next
-        if hasattr(self, "_last_search_text") and self._last_search_text == text and self.search_hits:
-            self.current_hit_index = (self.current_hit_index + 1) % len(self.search_hits)
-            self.go_to_hit(self.current_hit_index)
+        if hasattr(self, "_last_search_text") and self._last_search_text == text:
+            if self._search_chunks:
+                return # Same query is still being searched
+            # If same query as last time and hits already exist, just move to next
+            if self.search_hits:
+                self.current_hit_index = (self.current_hit_index + 1) % len(self.search_hits)
+                self.go_to_hit(self.current_hit_index)
+                self.update_search_status()
+                return
+            if self.search_hits_all is not None:
+                return # Already searched; nothing matches on the visible pages
+
+        # New search query — find all matches in the background, chunk by chunk.
+        # All pages are searched so filter changes only need to re-filter the hits.
+        self.cancel_search()
+        self._last_search_text = text
+        self.search_hits = []
+        self.search_hits_all = None
+        self.current_hit_index = -1
+        if self.total_pages == 0:
             self.update_search_status()
             return
 
-        # New search query — find all matches
-        self._last_search_text = text
-        hits = []
-        for page_num in self.visible_pages:
-            page = self.doc.load_page(page_num)
-            rects = page.search_for(text)
-            for r in rects:
-                hits.append((page_num, r))
-
-        self.search_hits = hits
-        if not hits:
+        search_id = self.render_signals.search_id
+        chunks = [range(i, min(i + SEARCH_CHUNK_PAGES, self.total_pages)) for i in range(0, self.total_pages, SEARCH_CHUNK_PAGES)]
+        self._search_chunks = [None] * len(chunks)
+        self.search_status_label.setText("Searching…")
+        for chunk_index, page_nums in enumerate(chunks):
+            self.search_pool.start(SearchTask(self.render_signals, self.pdf_path, self.render_signals.generation, search_id, chunk_index, page_nums, text))
+
+    def cancel_search(self):
+        """Abandons a running background search; its late results are ignored."""
+        self.search_pool.clear()
+        self.render_signals.search_id += 1
+        self._search_chunks = []
+
+    def on_search_chunk_ready(self, search_id, chunk_index, hits):
+        """Collects a finished search chunk and shows the results once all chunks are in."""
+        if search_id != self.render_signals.search_id or not self._search_chunks:
+            return # Result belongs to an abandoned search
+        self._search_chunks[chunk_index] = hits
+        if any(chunk is None for chunk in self._search_chunks):
+            return
+
+        # Chunks cover the pages in order, so the joined hits are in page order
+        self.search_hits_all = [hit for chunk in self._search_chunks for hit in chunk]
+        self._search_chunks = []
+        self.show_search_results()
+
+    def show_search_results(self):
+        """Keeps the hits of `search_hits_all` on visible pages and jumps to the first one."""
+        self.search_hits = [hit for hit in self.search_hits_all if hit[0] in self._visible_index]
+        if not self.search_hits:
             self.current_hit_index = -1
             self.update_search_status()
             return
@@ -1349,9 +2166,10 @@ class PDFTaggerApp(QMainWindow):
 
 
     def resizeEvent(self, event):
-        """Handles window resize. Re-renders the page."""
+        """Handles window resize. Re-renders the page once resizing pauses."""
         super().resizeEvent(event)
-        self.render_page() # Re-render to fit new size
+        self._resize_timer.start() # Restarted on every resize step
+        self.schedule_visible_thumbnails() # The sidebar may show more rows now
 
     def go_to_hit(self, idx):
         """Navigates to a specific search hit by its index."""
@@ -1362,8 +2180,9 @@ class PDFTaggerApp(QMainWindow):
         page_num, _ = self.search_hits[idx]
         
         # Navigate to the page of the hit
-        if page_num in self.visible_pages:
-            self.current_page_index = self.visible_pages.index(page_num)
+        index = self._visible_index.get(page_num)
+        if index is not None:
+            self.current_page_index = index
             self.render_page()
             self.center_sidebar_on_current()
 